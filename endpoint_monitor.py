@@ -10,56 +10,183 @@ This tool allows you to:
 """
 
 import argparse
+import http.cookiejar
 import json
+import io
 import os
 import sys
+import threading
 import time
 from datetime import datetime
+from urllib.parse import urlsplit
 import csv
 import requests
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Optional, Union, Any
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union, Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configuration and data store paths
 CONFIG_DIR = os.path.expanduser("~/.endpoint-monitor")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
 DATA_STORE_FILE = os.path.join(CONFIG_DIR, "data-store.csv")
+DATA_STORE_FIELDS = [
+    "name", "url", "timestamp", "status_code",
+    "response_time", "is_available", "error"
+]
+DATA_STORE_BUFFER_SIZE = 1024 * 1024  # bytes
+DATA_STORE_BATCH_SIZE = 64  # results written per data store append
 
 # Default settings
 DEFAULT_TIMEOUT = 10  # seconds
+DEFAULT_METHOD = "HEAD"  # probe without downloading the body
+PROBE_METHODS = ("HEAD", "GET")
+MAX_DRAIN_BYTES = 64 * 1024  # GET bodies up to this size are read so the connection can be reused
 DEFAULT_POLLING_INTERVAL = 60  # seconds
+DEFAULT_NEGATIVE_TTL = 30  # seconds
+DEFAULT_MAX_WORKERS = 256  # concurrent checks per scan
+HTTP_POOL_HOSTS = 64  # hosts whose keep-alive connections are pooled
+
+# Terminal colors for the results table
+GREEN = "\033[92m"
+RED = "\033[91m"
+RESET = "\033[0m"
 
 # Ensure configuration directory exists
 os.makedirs(CONFIG_DIR, exist_ok=True)
 
 
+def _json_loads(data: bytes) -> Any:
+    """Parse JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize to indented JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+
+def _max_workers_from_env() -> int:
+    """Read the worker limit from ENDPOINT_MONITOR_MAX_WORKERS, falling back to the default"""
+    value = os.environ.get("ENDPOINT_MONITOR_MAX_WORKERS")
+    if value is None:
+        return DEFAULT_MAX_WORKERS
+    try:
+        return max(1, int(value))
+    except ValueError:
+        print(f"Warning: invalid ENDPOINT_MONITOR_MAX_WORKERS '{value}', using {DEFAULT_MAX_WORKERS}")
+        return DEFAULT_MAX_WORKERS
+
+
+MAX_WORKERS = _max_workers_from_env()
+
+
+# Per-thread CSV encoder so workers can serialize results without sharing a buffer
+_csv_local = threading.local()
+
+
+def _to_csv_line(values: Iterable) -> str:
+    """Encode one row of values as a CSV line"""
+    encoder = getattr(_csv_local, "encoder", None)
+    if encoder is None:
+        buf = io.StringIO()
+        encoder = _csv_local.encoder = (buf, csv.writer(buf))
+        
+    buf, writer = encoder
+    buf.seek(0)
+    buf.truncate()
+    writer.writerow(values)
+    return buf.getvalue()
+
+
+def _result_to_csv_line(result: Dict) -> str:
+    """Encode a scan result as a data store CSV line"""
+    return _to_csv_line([result.get(field) for field in DATA_STORE_FIELDS])
+
+
+class ResultRow(NamedTuple):
+    """A scan result as displayed in the results table
+
+    Rows read back from the data store keep numeric fields as their stored text,
+    since the table only ever prints them.
+    """
+    name: str
+    url: str
+    timestamp: str
+    status_code: Union[int, str, None]
+    response_time: Union[float, str, None]
+    is_available: bool
+
+    @classmethod
+    def from_result(cls, result: Dict) -> "ResultRow":
+        """Build a row from a scan result dict"""
+        return cls(
+            result["name"], result["url"], result["timestamp"],
+            result["status_code"], result["response_time"], result["is_available"]
+        )
+
+
 class EndpointMonitor:
     """Main class for handling endpoint monitoring functionality"""
 
     def __init__(self):
         self.config = self._load_config()
+        # Worker pool kept alive by `live` so threads are reused across scans
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Data store handle, held for a whole scan (or the whole of `live`)
+        self._data_fh = None
+        # Whether the open data store handle already has a header, decided on its first write
+        self._header_written = False
+        # Shared session so keep-alive connections and TLS sessions survive between checks
+        self._session = requests.Session()
+        # Don't keep cookies between probes: sticky-session cookies would pin every probe to one backend
+        self._session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        # Keep a pool for every configured origin so probes to the same origin share its
+        # connections; every worker may hit the same origin, so each pool holds MAX_WORKERS.
+        # Entries without a URL are skipped so read-only commands don't depend on them
+        origins = {urlsplit(e["url"])[:2] for e in self.config["endpoints"].values() if e.get("url")}
+        adapter = HTTPAdapter(pool_connections=max(HTTP_POOL_HOSTS, len(origins)), pool_maxsize=MAX_WORKERS)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        # Recent failures by URL, reused by `live` until the TTL expires (0 disables)
+        self._negative_ttl = 0
+        self._negative_cache: Dict[str, Tuple[float, Dict]] = {}
+        # ETag / Last-Modified validators from each URL's last GET, for conditional requests
+        self._validators: Dict[str, Dict[str, str]] = {}
+
+    def close(self):
+        """Release pooled HTTP connections"""
+        self._session.close()
 
     def _load_config(self) -> Dict:
         """Load configuration from file or create default if it doesn't exist"""
         if not os.path.exists(CONFIG_FILE):
             default_config = {"endpoints": {}}
-            with open(CONFIG_FILE, "w") as f:
-                json.dump(default_config, f, indent=4)
+            with open(CONFIG_FILE, "wb") as f:
+                f.write(_json_dumps(default_config))
             return default_config
 
         try:
-            with open(CONFIG_FILE, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
+            with open(CONFIG_FILE, "rb") as f:
+                return _json_loads(f.read())
+        except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses this
             print(f"Error: Config file {CONFIG_FILE} is corrupted")
             sys.exit(1)
 
     def _save_config(self):
         """Save current configuration to file"""
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(self.config, f, indent=4)
+        with open(CONFIG_FILE, "wb") as f:
+            f.write(_json_dumps(self.config))
 
-    def add_endpoint(self, name: str, url: str, timeout: int = DEFAULT_TIMEOUT):
+    def add_endpoint(self, name: str, url: str, timeout: int = DEFAULT_TIMEOUT, method: str = DEFAULT_METHOD):
         """Add a new endpoint to the configuration"""
         if name in self.config["endpoints"]:
             print(f"Error: Endpoint '{name}' already exists")
@@ -67,23 +194,64 @@ class EndpointMonitor:
 
         self.config["endpoints"][name] = {
             "url": url,
-            "timeout": timeout
+            "timeout": timeout,
+            "method": method
         }
         self._save_config()
-        print(f"Added endpoint: {name} ({url}) with timeout {timeout}s")
+        print(f"Added endpoint: {name} ({url}) with timeout {timeout}s using {method}")
         return True
 
+    def _request(self, url: str, method: str, timeout: int) -> requests.Response:
+        """Request an endpoint's status without downloading its body"""
+        if method == "HEAD":
+            response = self._session.head(url, timeout=timeout, allow_redirects=True)
+            if response.status_code not in (405, 501):
+                return response
+            # The server doesn't support HEAD; fall back to a GET
+            
+        # Stream so large bodies are never downloaded, and revalidate so unchanged resources return 304
+        response = self._session.get(
+            url, timeout=timeout, allow_redirects=True, stream=True, headers=self._validators.get(url)
+        )
+        
+        # A connection only goes back to the pool once its body is fully read, so drain small
+        # bodies; anything larger is abandoned and closing it drops the connection instead
+        drained = 0
+        for chunk in response.iter_content(chunk_size=8192):
+            drained += len(chunk)
+            if drained > MAX_DRAIN_BYTES:
+                break
+        response.close()
+        
+        validators = {}
+        if "ETag" in response.headers:
+            validators["If-None-Match"] = response.headers["ETag"]
+        if "Last-Modified" in response.headers:
+            validators["If-Modified-Since"] = response.headers["Last-Modified"]
+        if validators:
+            self._validators[url] = validators
+            
+        return response
+
     def _check_endpoint(self, name: str, endpoint_data: Dict) -> Dict:
         """Check if an endpoint is available"""
         url = endpoint_data["url"]
         timeout = endpoint_data.get("timeout", DEFAULT_TIMEOUT)
+        method = endpoint_data.get("method", DEFAULT_METHOD)
         
         timestamp = datetime.now().isoformat()
         
+        # Report a recently failed endpoint as still down instead of waiting on it again
+        if self._negative_ttl:
+            cached = self._negative_cache.get(url)
+            if cached and time.monotonic() - cached[0] < self._negative_ttl:
+                return dict(cached[1], name=name, timestamp=timestamp,
+                            error=f"Skipped: failed within the last {self._negative_ttl}s ({cached[1]['error']})")
+        
         try:
-            start_time = time.time()
-            response = requests.get(url, timeout=timeout, allow_redirects=True)
-            response_time = time.time() - start_time
+            start_time = time.perf_counter()
+            response = self._request(url, method, timeout)
+            response_time = time.perf_counter() - start_time
             
             status_code = response.status_code
             is_available = 200 <= status_code < 400
@@ -96,6 +264,7 @@ class EndpointMonitor:
                 "response_time": round(response_time * 1000, 2),  # convert to ms
                 "is_available": is_available
             }
+            self._negative_cache.pop(url, None)
             
         except requests.exceptions.RequestException as e:
             result = {
@@ -107,24 +276,38 @@ class EndpointMonitor:
                 "is_available": False,
                 "error": str(e)
             }
+            if self._negative_ttl:
+                self._negative_cache[url] = (time.monotonic(), result)
             
         return result
 
-    def _save_result(self, result: Dict):
-        """Save a scan result to the data store"""
-        file_exists = os.path.exists(DATA_STORE_FILE)
-        
-        with open(DATA_STORE_FILE, "a", newline="") as f:
-            fieldnames = [
-                "name", "url", "timestamp", "status_code", 
-                "response_time", "is_available", "error"
-            ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+    def _open_data_store(self):
+        """Open the data store for appending and keep the handle on the instance"""
+        # Append mode is O_APPEND, so monitors sharing the file never overwrite each other
+        self._data_fh = open(DATA_STORE_FILE, "a", newline="", buffering=DATA_STORE_BUFFER_SIZE)
+        self._header_written = False
+
+    def _close_data_store(self):
+        """Flush and close the data store handle if one is open"""
+        if self._data_fh is not None:
+            self._data_fh.close()
+            self._data_fh = None
+
+    def _save_results(self, lines: List[str]):
+        """Append a batch of pre-encoded result lines to the open data store"""
+        # Check the file size on the first write rather than at startup, so another monitor
+        # that created the store in the meantime doesn't get a second header
+        if not self._header_written:
+            if os.fstat(self._data_fh.fileno()).st_size == 0:
+                self._data_fh.write(_to_csv_line(DATA_STORE_FIELDS))
+            self._header_written = True
             
-            if not file_exists:
-                writer.writeheader()
-                
-            writer.writerow(result)
+        self._data_fh.write("".join(lines))
+
+    def _check_and_encode(self, name: str, endpoint_data: Dict) -> Tuple[Dict, str]:
+        """Check an endpoint and encode its result for the data store, on the worker thread"""
+        result = self._check_endpoint(name, endpoint_data)
+        return result, _result_to_csv_line(result)
 
     def fetch(self, endpoint_names: Optional[List[str]] = None, output: bool = False) -> List[Dict]:
         """Scan specified endpoints or all if none specified"""
@@ -143,110 +326,174 @@ class EndpointMonitor:
         else:
             to_check = endpoints
             
-        results = []
+        # Results are stored in completion order but returned in submission order
+        results: List[Optional[Dict]] = [None] * len(to_check)
+        pending = []
         
-        # Use ThreadPoolExecutor to check endpoints concurrently
-        with ThreadPoolExecutor() as executor:
-            future_to_endpoint = {
-                executor.submit(self._check_endpoint, name, data): name 
-                for name, data in to_check.items()
+        # A one-shot scan holds the data store open just for itself; `live` keeps it open
+        owns_data_store = self._data_fh is None
+        if owns_data_store:
+            self._open_data_store()
+            
+        # Check endpoints concurrently, reusing the live pool when there is one
+        executor = self._executor or ThreadPoolExecutor(max_workers=self._max_workers(len(to_check)))
+        try:
+            future_to_index = {
+                executor.submit(self._check_and_encode, name, data): i
+                for i, (name, data) in enumerate(to_check.items())
             }
             
-            for future in future_to_endpoint:
-                result = future.result()
-                results.append(result)
-                self._save_result(result)
+            # Store results in batches as they complete so fast checks aren't held behind slow ones
+            for future in as_completed(future_to_index):
+                result, line = future.result()
+                results[future_to_index[future]] = result
+                pending.append(line)
+                
+                if len(pending) >= DATA_STORE_BATCH_SIZE:
+                    self._save_results(pending)
+                    pending = []
+                    
+            if pending:
+                self._save_results(pending)
+        finally:
+            if executor is not self._executor:
+                executor.shutdown()
+                
+            if owns_data_store:
+                self._close_data_store()
+            else:
+                # One flush per scan keeps `history` current without flushing per row
+                self._data_fh.flush()
                 
         # Output results if requested
         if output:
-            self._print_results(results)
+            self._print_results(map(ResultRow.from_result, results))
             
         return results
 
-    def _print_results(self, results: List[Dict]):
+    @staticmethod
+    def _max_workers(count: int) -> int:
+        """Size a worker pool for the given number of endpoints"""
+        return max(1, min(MAX_WORKERS, count))
+
+    def _print_results(self, rows: Iterable[ResultRow]):
         """Print scan results in a table format"""
-        if not results:
+        # Format each row and track column widths in a single pass
+        name_width, url_width = len("ENDPOINT"), len("URL")
+        status_width, response_width = len("STATUS"), len("RESPONSE TIME (ms)")
+        formatted = []
+        
+        for r in rows:
+            response_time = str(r.response_time) if r.response_time is not None else "N/A"
+            formatted.append((r.name, r.url, r.is_available, response_time, r.timestamp))
+            
+            if len(r.name) > name_width:
+                name_width = len(r.name)
+            if len(r.url) > url_width:
+                url_width = len(r.url)
+                
+        if not formatted:
             print("No results to display")
             return
             
-        # Calculate column widths
-        col_widths = {
-            "name": max(len("ENDPOINT"), max(len(r["name"]) for r in results)),
-            "url": max(len("URL"), max(len(r["url"]) for r in results)),
-            "status": len("STATUS"),
-            "response_time": len("RESPONSE TIME (ms)"),
-        }
+        # Build one format template for the table, then write it out in one go
+        line_fmt = f"{{:<{name_width}}} {{:<{url_width}}} {{}}{{:<{status_width}}}{{}} {{:<{response_width}}} {{}}"
+        lines = [
+            line_fmt.format("ENDPOINT", "URL", "", "STATUS", "", "RESPONSE TIME (ms)", "TIMESTAMP"),
+            "-" * (name_width + url_width + status_width + response_width + 50),
+        ]
         
-        # Print header
-        print(
-            f"{'ENDPOINT':<{col_widths['name']}} "
-            f"{'URL':<{col_widths['url']}} "
-            f"{'STATUS':<{col_widths['status']}} "
-            f"{'RESPONSE TIME (ms)':<{col_widths['response_time']}} "
-            f"TIMESTAMP"
+        for name, url, is_available, response_time, timestamp in formatted:
+            if is_available:
+                lines.append(line_fmt.format(name, url, GREEN, "UP", RESET, response_time, timestamp))
+            else:
+                lines.append(line_fmt.format(name, url, RED, "DOWN", RESET, response_time, timestamp))
+                
+        sys.stdout.write("\n".join(lines) + "\n")
+
+    def live(self, interval: int = DEFAULT_POLLING_INTERVAL, endpoint_names: Optional[List[str]] = None, output: bool = False,
+             negative_ttl: int = DEFAULT_NEGATIVE_TTL):
+        """Continuously monitor endpoints at specified intervals"""
+        self._negative_ttl = negative_ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers(len(endpoint_names or self.config["endpoints"]))
         )
-        print("-" * (col_widths['name'] + col_widths['url'] + col_widths['status'] + col_widths['response_time'] + 50))
+        self._open_data_store()
         
-        # Print each result
-        for r in results:
-            status = "UP" if r["is_available"] else "DOWN"
-            status_color = "\033[92m" if r["is_available"] else "\033[91m"  # Green for UP, Red for DOWN
-            reset_color = "\033[0m"
-            
-            response_time = str(r["response_time"]) if r["response_time"] is not None else "N/A"
-            
-            print(
-                f"{r['name']:<{col_widths['name']}} "
-                f"{r['url']:<{col_widths['url']}} "
-                f"{status_color}{status:<{col_widths['status']}}{reset_color} "
-                f"{response_time:<{col_widths['response_time']}} "
-                f"{r['timestamp']}"
-            )
-
-    def live(self, interval: int = DEFAULT_POLLING_INTERVAL, endpoint_names: Optional[List[str]] = None, output: bool = False):
-        """Continuously monitor endpoints at specified intervals"""
         try:
             print(f"Starting live monitoring with interval {interval}s. Press Ctrl+C to stop.")
             
+            # Schedule scans on a monotonic deadline so scan time doesn't add drift
+            next_tick = time.monotonic() + interval
+            
             while True:
-                results = self.fetch(endpoint_names, output=output)
-                time.sleep(interval)
+                self.fetch(endpoint_names, output=output)
+                
+                now = time.monotonic()
+                if now > next_tick:
+                    # Don't try to catch up on missed ticks; start a fresh interval instead.
+                    # A zero interval means back-to-back scans, so there is nothing to warn about
+                    if interval > 0:
+                        print(f"Warning: scan took longer than the {interval}s interval")
+                    next_tick = now + interval
+                    
+                time.sleep(next_tick - now)
+                next_tick += interval
                 
         except KeyboardInterrupt:
             print("\nLive monitoring stopped")
-
-    def history(self, endpoint_names: Optional[List[str]] = None):
-        """Show scan history from the data store"""
-        if not os.path.exists(DATA_STORE_FILE):
-            print("No history available yet")
-            return
             
-        results = []
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._close_data_store()
+            self._negative_ttl = 0
+            self._negative_cache.clear()
+
+    def _read_history(self, endpoint_names: Optional[List[str]] = None) -> Iterator[ResultRow]:
+        """Stream rows from the data store, optionally filtered by endpoint name"""
+        wanted = set(endpoint_names) if endpoint_names else None
         
         with open(DATA_STORE_FILE, "r", newline="") as f:
-            reader = csv.DictReader(f)
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+                
+            idx = {column: i for i, column in enumerate(header)}
+            name_i, url_i, timestamp_i = idx["name"], idx["url"], idx["timestamp"]
+            status_i, response_i, available_i = idx["status_code"], idx["response_time"], idx["is_available"]
             
             for row in reader:
-                # Convert string values to appropriate types
-                row["is_available"] = row["is_available"].lower() == "true"
-                
-                if row["status_code"] and row["status_code"] != "None":
-                    row["status_code"] = int(row["status_code"])
-                else:
-                    row["status_code"] = None
+                # Blank lines come through as empty rows; DictReader used to skip them
+                if not row:
+                    continue
                     
-                if row["response_time"] and row["response_time"] != "None":
-                    row["response_time"] = float(row["response_time"])
-                else:
-                    row["response_time"] = None
-                
-                # Filter by endpoint names if provided
-                if endpoint_names and row["name"] not in endpoint_names:
+                # Filter before converting anything so skipped rows stay cheap
+                name = row[name_i]
+                if wanted is not None and name not in wanted:
                     continue
                     
-                results.append(row)
+                # Numbers stay as stored text; only missing values are normalized
+                status_code = row[status_i]
+                response_time = row[response_i]
                 
-        self._print_results(results)
+                yield ResultRow(
+                    name,
+                    row[url_i],
+                    row[timestamp_i],
+                    status_code if status_code and status_code != "None" else None,
+                    response_time if response_time and response_time != "None" else None,
+                    row[available_i] == "True",  # written from a Python bool
+                )
+
+    def history(self, endpoint_names: Optional[List[str]] = None):
+        """Show scan history from the data store"""
+        if not os.path.exists(DATA_STORE_FILE):
+            print("No history available yet")
+            return
+            
+        self._print_results(self._read_history(endpoint_names))
 
 
 def main():
@@ -259,6 +506,8 @@ def main():
     add_parser.add_argument("name", help="Name of the endpoint")
     add_parser.add_argument("url", help="URL of the endpoint")
     add_parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help="Timeout in seconds")
+    add_parser.add_argument("--method", choices=PROBE_METHODS, default=DEFAULT_METHOD,
+                            help="HTTP method used to probe the endpoint")
     
     # fetch command
     fetch_parser = subparsers.add_parser("fetch", help="Scan all configured endpoints")
@@ -270,6 +519,9 @@ def main():
     live_parser.add_argument("--interval", type=int, default=DEFAULT_POLLING_INTERVAL, help="Polling interval in seconds")
     live_parser.add_argument("--output", action="store_true", help="Output scan results")
     live_parser.add_argument("--endpoints", nargs="+", help="Specific endpoints to scan")
+    live_parser.add_argument("--negative-ttl", type=int, default=DEFAULT_NEGATIVE_TTL,
+                             help="Seconds to keep reporting a failed endpoint as down before probing it again; "
+                                  "only skips probes when longer than --interval (0 disables)")
     
     # history command
     history_parser = subparsers.add_parser("history", help="Show scan history")
@@ -281,20 +533,24 @@ def main():
     monitor = EndpointMonitor()
     
     # Execute command
-    if args.command == "add-endpoint":
-        monitor.add_endpoint(args.name, args.url, args.timeout)
-        
-    elif args.command == "fetch":
-        monitor.fetch(args.endpoints, args.output)
-        
-    elif args.command == "live":
-        monitor.live(args.interval, args.endpoints, args.output)
-        
-    elif args.command == "history":
-        monitor.history(args.endpoints)
-        
-    else:
-        parser.print_help()
+    try:
+        if args.command == "add-endpoint":
+            monitor.add_endpoint(args.name, args.url, args.timeout, args.method)
+            
+        elif args.command == "fetch":
+            monitor.fetch(args.endpoints, args.output)
+            
+        elif args.command == "live":
+            monitor.live(args.interval, args.endpoints, args.output, args.negative_ttl)
+            
+        elif args.command == "history":
+            monitor.history(args.endpoints)
+            
+        else:
+            parser.print_help()
+            
+    finally:
+        monitor.close()
 
 
 if __name__ == "__main__":
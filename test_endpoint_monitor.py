@@ -1,235 +1,464 @@
 import os
 import json
+import shutil
 import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock, call
 import sys
 import csv
-import requests
 from io import StringIO
+from types import SimpleNamespace
+from concurrent.futures import Future
 
 # Importe o módulo a ser testado
-from endpoint_monitor import EndpointMonitor, CONFIG_FILE, DATA_STORE_FILE
+from endpoint_monitor import (
+    EndpointMonitor, ResultRow, DATA_STORE_FIELDS,
+    _max_workers_from_env, _result_to_csv_line, _to_csv_line,
+)
+
+# Configuração de exemplo, construída e serializada uma única vez
+_SAMPLE_CONFIG = {
+    "endpoints": {
+        "test1": {
+            "url": "https://google.com",
+            "timeout": 5
+        },
+        "test2": {
+            "url": "https://mercedes-benz.io",
+            "timeout": 10
+        }
+    }
+}
+_SAMPLE_CONFIG_JSON = json.dumps(_SAMPLE_CONFIG)
+
+# Respostas HTTP simuladas; só o status_code é lido, por isso não precisam de ser MagicMock
+_OK_RESPONSE = SimpleNamespace(status_code=200)
+_METHOD_NOT_ALLOWED_RESPONSE = SimpleNamespace(status_code=405)
+
+# Resultados devolvidos pelos checks simulados em test_fetch
+_FETCH_RESULTS = (
+    {
+        "name": "test1",
+        "url": "https://google.com",
+        "timestamp": "2023-01-01T12:00:00",
+        "status_code": 200,
+        "response_time": 150.5,
+        "is_available": True
+    },
+    {
+        "name": "test2",
+        "url": "https://mercedes-benz.io",
+        "timestamp": "2023-01-01T12:00:00",
+        "status_code": 404,
+        "response_time": 200.3,
+        "is_available": False
+    },
+)
 
 
 class TestEndpointMonitor(unittest.TestCase):
     """Testes para a classe EndpointMonitor"""
 
-    def setUp(self):
-        """Configurar ambiente de teste"""
-        # Criar diretório temporário para configuração e dados
-        self.temp_dir = tempfile.TemporaryDirectory()
+    @classmethod
+    def setUpClass(cls):
+        """Configurar ambiente partilhado por todos os testes da classe"""
+        # Criar diretório temporário para configuração e dados, uma única vez
+        config_dir = tempfile.mkdtemp(prefix='em_cfg_')
+        cls.addClassCleanup(shutil.rmtree, config_dir, ignore_errors=True)
         
         # Definir caminhos para os arquivos de teste
-        config_dir = os.path.join(self.temp_dir.name, 'config')
-        os.makedirs(config_dir, exist_ok=True)
-        
-        self.test_config_file = os.path.join(config_dir, 'config.json')
-        self.test_data_store_file = os.path.join(config_dir, 'data-store.csv')
+        cls.test_config_file = os.path.join(config_dir, 'config.json')
+        cls.test_data_store_file = os.path.join(config_dir, 'data-store.csv')
         
-        # Salvar caminhos originais para restaurar depois
-        self.original_config_file = CONFIG_FILE
-        self.original_data_store_file = DATA_STORE_FILE
+        # Patch as constantes no módulo endpoint_monitor; o patcher repõe os originais
+        cls.paths_patcher = patch.multiple(
+            'endpoint_monitor',
+            CONFIG_FILE=cls.test_config_file,
+            DATA_STORE_FILE=cls.test_data_store_file,
+        )
+        cls.paths_patcher.start()
+        cls.addClassCleanup(cls.paths_patcher.stop)
         
-        # Patch as constantes no módulo endpoint_monitor
-        self.config_file_patcher = patch('endpoint_monitor.CONFIG_FILE', self.test_config_file)
-        self.data_store_file_patcher = patch('endpoint_monitor.DATA_STORE_FILE', self.test_data_store_file)
-        
-        self.mock_config_file = self.config_file_patcher.start()
-        self.mock_data_store_file = self.data_store_file_patcher.start()
-    
-    def tearDown(self):
-        """Limpar após os testes"""
-        # Parar os patchers
-        self.config_file_patcher.stop()
-        self.data_store_file_patcher.stop()
+        # Monitor partilhado pelos testes que não dependem nem alteram o seu estado
+        with open(cls.test_config_file, 'w') as f:
+            f.write('{"endpoints": {}}')
+        cls._monitor = EndpointMonitor()
+        cls.addClassCleanup(cls._monitor.close)
+
+    def setUp(self):
+        """Repor configuração e dados antes de cada teste"""
+        with open(self.test_config_file, 'w') as f:
+            f.write('{"endpoints": {}}')
         
-        # Remover diretório temporário
-        self.temp_dir.cleanup()
+        if os.path.exists(self.test_data_store_file):
+            os.remove(self.test_data_store_file)
 
     def test_load_config(self):
         """Testar carregamento da configuração"""
-        # Definir configuração de exemplo
-        sample_config = {
-            "endpoints": {
-                "test1": {
-                    "url": "https://google.com",
-                    "timeout": 5
-                }
-            }
-        }
-        
         # Escrever configuração no arquivo
         with open(self.test_config_file, 'w') as f:
-            json.dump(sample_config, f)
+            f.write(_SAMPLE_CONFIG_JSON)
         
         # Instanciar monitor para carregar configuração
         monitor = EndpointMonitor()
         
         # Verificar se a configuração foi carregada corretamente
-        self.assertEqual(monitor.config, sample_config)
+        self.assertEqual(monitor.config, _SAMPLE_CONFIG)
+        
+        # Uma entrada sem URL não impede a criação do monitor (ex.: para consultar o histórico)
+        with open(self.test_config_file, 'w') as f:
+            f.write('{"endpoints": {"broken": {"timeout": 5}}}')
+        monitor = EndpointMonitor()
+        self.addCleanup(monitor.close)
+        self.assertEqual(monitor.config["endpoints"]["broken"], {"timeout": 5})
 
-    def test_add_endpoint(self):
+    @patch('endpoint_monitor.print', create=True)
+    @patch.object(EndpointMonitor, '_save_config', return_value=None)
+    @patch.object(EndpointMonitor, '_load_config', lambda self: {"endpoints": {}})
+    def test_add_endpoint(self, mock_save_config, mock_print):
         """Testar adição de um novo endpoint"""
-        # Criar arquivo de configuração vazio
-        with open(self.test_config_file, 'w') as f:
-            json.dump({"endpoints": {}}, f)
-        
-        # Instanciar monitor
+        # Instanciar monitor com configuração vazia em memória, sem ler do disco
         monitor = EndpointMonitor()
         
-        # Adicionar endpoint
+        # Adicionar endpoint (a gravação em disco é substituída por um mock)
         monitor.add_endpoint("test1", "https://google.com", 5)
         
         # Verificar se foi adicionado corretamente
-        self.assertIn("test1", monitor.config["endpoints"])
-        self.assertEqual(monitor.config["endpoints"]["test1"]["url"], "https://google.com")
-        self.assertEqual(monitor.config["endpoints"]["test1"]["timeout"], 5)
+        self.assertEqual(
+            monitor.config["endpoints"]["test1"],
+            {"url": "https://google.com", "timeout": 5, "method": "HEAD"}
+        )
         
         # Testar adição de endpoint duplicado
-        with patch('sys.stdout', new=StringIO()) as fake_out:
-            result = monitor.add_endpoint("test1", "https://example.com", 10)
-            self.assertFalse(result)
-            self.assertIn("already exists", fake_out.getvalue())
+        result = monitor.add_endpoint("test1", "https://example.com", 10)
+        self.assertFalse(result)
+        mock_print.assert_called_with("Error: Endpoint 'test1' already exists")
+        
+        # Só o endpoint novo foi gravado; o duplicado não chega ao disco
+        mock_save_config.assert_called_once()
 
-    @patch('requests.get')
-    def test_check_endpoint_success(self, mock_get):
+    @patch('requests.Session.head')
+    def test_check_endpoint_success(self, mock_head):
         """Testar verificação de endpoint que está online"""
         # Configurar mock de resposta
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        mock_head.return_value = _OK_RESPONSE
         
-        # Instanciar monitor
-        monitor = EndpointMonitor()
+        # Usar o monitor partilhado; _check_endpoint não depende da configuração
+        monitor = self._monitor
         
         # Verificar endpoint
         result = monitor._check_endpoint("test1", {"url": "https://mercedes-benz.io", "timeout": 5})
         
         # Verificar resultado
-        self.assertEqual(result["name"], "test1")
-        self.assertEqual(result["url"], "https://mercedes-benz.io")
-        self.assertEqual(result["status_code"], 200)
-        self.assertTrue(result["is_available"])
+        self.assertEqual(
+            {k: result[k] for k in ("name", "url", "status_code", "is_available")},
+            {"name": "test1", "url": "https://mercedes-benz.io", "status_code": 200, "is_available": True}
+        )
         self.assertIsNotNone(result["timestamp"])
         self.assertIsNotNone(result["response_time"])
 
-    @patch('requests.get')
-    def test_check_endpoint_failure(self, mock_get):
-        """Testar verificação de endpoint que está offline"""
-        # Configurar mock para simular erro de conexão
-        mock_get.side_effect = requests.exceptions.ConnectionError("Connection refused")
+    @patch('requests.Session.get')
+    @patch('requests.Session.head')
+    def test_check_endpoint_head_not_allowed(self, mock_head, mock_get):
+        """Testar fallback para GET quando o servidor rejeita HEAD"""
+        mock_head.return_value = _METHOD_NOT_ALLOWED_RESPONSE
+        mock_get.return_value = MagicMock(status_code=200, headers={"ETag": '"abc"'})
         
-        # Instanciar monitor
         monitor = EndpointMonitor()
+        result = monitor._check_endpoint("test1", {"url": "https://mercedes-benz.io", "timeout": 5})
+        
+        # O GET é feito em streaming, sem ler o corpo, e o ETag é guardado para o próximo pedido
+        self.assertEqual(result["status_code"], 200)
+        self.assertTrue(result["is_available"])
+        self.assertTrue(mock_get.call_args.kwargs["stream"])
+        mock_get.return_value.close.assert_called_once()
+        self.assertEqual(monitor._validators["https://mercedes-benz.io"], {"If-None-Match": '"abc"'})
+
+    def test_check_endpoint_get_reuses_connection(self):
+        """Testar que probes GET devolvem a ligação ao pool em vez de a fechar, sem guardar cookies"""
+        connections = []
+        cookies_received = []
+        
+        class _KeepAliveHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def setup(self):
+                connections.append(self.client_address)
+                super().setup()
+            
+            def do_GET(self):
+                cookies_received.append(self.headers.get("Cookie"))
+                body = b"ok"
+                self.send_response(200)
+                self.send_header("Set-Cookie", "backend=1; Path=/")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        
+        monitor = EndpointMonitor()
+        self.addCleanup(monitor.close)
+        endpoint = {"url": f"http://127.0.0.1:{server.server_port}/", "timeout": 5, "method": "GET"}
+        
+        for _ in range(3):
+            self.assertTrue(monitor._check_endpoint("local", endpoint)["is_available"])
+        
+        # Os três probes partilham uma única ligação keep-alive
+        self.assertEqual(len(connections), 1)
+        # Cookies de sessão (ex.: sticky sessions) não são reenviados entre probes
+        self.assertEqual(cookies_received, [None, None, None])
+
+    @patch('requests.Session.head')
+    def test_check_endpoint_failure(self, mock_head):
+        """Testar verificação de endpoint que está offline"""
+        # Configurar mock para simular erro de conexão (import local: o módulo já o carregou)
+        import requests
+        mock_head.side_effect = requests.exceptions.ConnectionError("Connection refused")
+        
+        # Usar o monitor partilhado; _check_endpoint não depende da configuração
+        monitor = self._monitor
         
         # Verificar endpoint
         result = monitor._check_endpoint("test2", {"url": "https://mercedes-benz.io", "timeout": 10})
         
         # Verificar resultado
-        self.assertEqual(result["name"], "test2")
-        self.assertEqual(result["url"], "https://mercedes-benz.io")
-        self.assertIsNone(result["status_code"])
-        self.assertFalse(result["is_available"])
+        self.assertEqual(
+            {k: result[k] for k in ("name", "url", "status_code", "response_time", "is_available")},
+            {"name": "test2", "url": "https://mercedes-benz.io", "status_code": None,
+             "response_time": None, "is_available": False}
+        )
         self.assertIsNotNone(result["timestamp"])
-        self.assertIsNone(result["response_time"])
         self.assertIn("Connection refused", result["error"])
 
+    @patch('requests.Session.head')
+    def test_check_endpoint_negative_cache(self, mock_head):
+        """Testar que uma falha recente é reutilizada enquanto o TTL não expira"""
+        import requests
+        mock_head.side_effect = requests.exceptions.ConnectionError("Connection refused")
+        
+        monitor = EndpointMonitor()
+        monitor._negative_ttl = 30
+        
+        first = monitor._check_endpoint("test2", {"url": "https://mercedes-benz.io", "timeout": 10})
+        second = monitor._check_endpoint("test2", {"url": "https://mercedes-benz.io", "timeout": 10})
+        
+        # Apenas o primeiro pedido chega à rede; o segundo reporta a mesma falha
+        self.assertEqual(mock_head.call_count, 1)
+        self.assertFalse(second["is_available"])
+        self.assertEqual(second["error"], "Skipped: failed within the last 30s (Connection refused)")
+        self.assertEqual(first["error"], "Connection refused")
+        
+        # Uma terceira verificação não acumula prefixos
+        third = monitor._check_endpoint("test2", {"url": "https://mercedes-benz.io", "timeout": 10})
+        self.assertEqual(third["error"], second["error"])
+
+    @patch.object(EndpointMonitor, '_load_config', return_value=_SAMPLE_CONFIG)
+    @patch.object(EndpointMonitor, '_save_results')
     @patch('endpoint_monitor.ThreadPoolExecutor')
-    def test_fetch(self, mock_executor):
+    def test_fetch(self, mock_executor, mock_save, mock_load_config):
         """Testar método fetch para buscar status de endpoints"""
-        # Configurar ambiente do teste
-        sample_config = {
-            "endpoints": {
-                "test1": {
-                    "url": "https://google.com",
-                    "timeout": 5
-                },
-                "test2": {
-                    "url": "https://mercedes-benz.io",
-                    "timeout": 10
-                }
-            }
-        }
-        
-        # Escrever configuração no arquivo
-        with open(self.test_config_file, 'w') as f:
-            json.dump(sample_config, f)
-            
         # Configurar mocks para o ThreadPoolExecutor
         mock_executor_instance = MagicMock()
-        mock_executor.return_value.__enter__.return_value = mock_executor_instance
+        mock_executor.return_value = mock_executor_instance
         
-        # Configurar resultados dos mocks
-        result1 = {
-            "name": "test1",
-            "url": "https://google.com",
-            "timestamp": "2023-01-01T12:00:00",
-            "status_code": 200,
-            "response_time": 150.5,
-            "is_available": True
-        }
+        # Resultados dos mocks
+        result1, result2 = _FETCH_RESULTS
+        
+        # Configurar o Future para o primeiro endpoint (resultado + linha CSV já codificada)
+        future1 = Future()
+        future1.set_result((result1, "test1-line\r\n"))
         
-        result2 = {
+        # Configurar o Future para o segundo endpoint
+        future2 = Future()
+        future2.set_result((result2, "test2-line\r\n"))
+        
+        # Fazer o mock_executor_instance.submit retornar os futures adequados
+        mock_executor_instance.submit.side_effect = [future1, future2]
+        
+        # Instanciar monitor com a configuração em memória (_load_config) e sem escrita em disco (_save_results)
+        monitor = EndpointMonitor()
+        
+        # Executar método fetch
+        results = monitor.fetch(output=False)
+        
+        # Verificar se submit foi chamado duas vezes (uma para cada endpoint)
+        self.assertEqual(mock_executor_instance.submit.call_count, 2)
+        
+        # Verificar se as linhas codificadas foram gravadas num único lote
+        mock_save.assert_called_once()
+        self.assertCountEqual(mock_save.call_args.args[0], ["test1-line\r\n", "test2-line\r\n"])
+        
+        # Verificar que os resultados vêm pela ordem da configuração, não pela de conclusão
+        self.assertEqual(results, [result1, result2])
+        
+        # Testar fetch com endpoints específicos, reutilizando os mesmos patches
+        mock_executor_instance.reset_mock()
+        mock_save.reset_mock()
+        mock_executor_instance.submit.side_effect = [future1]
+        
+        # Chamar fetch com nome de endpoint específico
+        results = monitor.fetch(endpoint_names=["test1"], output=False)
+        
+        # Verificar se submit foi chamado apenas uma vez, para o endpoint pedido
+        self.assertEqual(mock_executor_instance.submit.call_count, 1)
+        self.assertEqual(mock_executor_instance.submit.call_args.args[1:], ("test1", _SAMPLE_CONFIG["endpoints"]["test1"]))
+        mock_save.assert_called_once_with(["test1-line\r\n"])
+        
+        # Verificar o resultado
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0], result1)
+        
+        # Pedir endpoints repetidos e desconhecidos: mantém-se a ordem pedida, sem duplicados
+        mock_executor_instance.reset_mock()
+        mock_executor_instance.submit.side_effect = [future2, future1]
+        results = monitor.fetch(endpoint_names=["test2", "test1", "test2", "unknown"], output=False)
+        submitted = [c.args[1] for c in mock_executor_instance.submit.call_args_list]
+        self.assertEqual(submitted, ["test2", "test1"])
+        self.assertEqual(results, [result2, result1])
+
+    def test_read_history(self):
+        """Testar leitura do histórico filtrado por endpoint"""
+        # Escrever histórico com dois endpoints e uma linha em branco pelo meio
+        with open(self.test_data_store_file, 'w', newline='') as f:
+            f.write(
+                "name,url,timestamp,status_code,response_time,is_available,error\n"
+                "test1,https://google.com,2023-01-01T12:00:00,200,150.5,True,\n"
+                "\r\n"
+                "test2,https://mercedes-benz.io,2023-01-01T12:00:00,,,False,timeout\n"
+            )
+        
+        monitor = EndpointMonitor()
+        
+        # Verificar que apenas as linhas dos endpoints pedidos são devolvidas
+        rows = list(monitor._read_history(["test1"]))
+        self.assertEqual(rows, [
+            ResultRow("test1", "https://google.com", "2023-01-01T12:00:00", "200", "150.5", True)
+        ])
+        
+        # Verificar que valores em falta são normalizados para None
+        rows = list(monitor._read_history(["test2"]))
+        self.assertEqual(rows, [
+            ResultRow("test2", "https://mercedes-benz.io", "2023-01-01T12:00:00", None, None, False)
+        ])
+        
+        # Sem filtro, a linha em branco é ignorada
+        self.assertEqual(len(list(monitor._read_history())), 2)
+
+    def test_data_store_roundtrip(self):
+        """Testar que resultados gravados no data store são lidos pelo histórico"""
+        result = {
             "name": "test2",
             "url": "https://mercedes-benz.io",
             "timestamp": "2023-01-01T12:00:00",
-            "status_code": 404,
-            "response_time": 200.3,
-            "is_available": False
+            "status_code": None,
+            "response_time": None,
+            "is_available": False,
+            "error": 'Connection refused, "retry"',
         }
         
-        # Configurar o Future para o primeiro endpoint
-        future1 = MagicMock()
-        future1.result.return_value = result1
+        monitor = EndpointMonitor()
+        monitor._open_data_store()
+        monitor._save_results([_result_to_csv_line(result)])
+        monitor._close_data_store()
         
-        # Configurar o Future para o segundo endpoint
-        future2 = MagicMock()
-        future2.result.return_value = result2
+        # Verificar cabeçalho e linha gravados, incluindo campos com aspas e vírgulas
+        with open(self.test_data_store_file, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows[0]["error"], 'Connection refused, "retry"')
+        self.assertEqual(list(monitor._read_history()), [
+            ResultRow("test2", "https://mercedes-benz.io", "2023-01-01T12:00:00", None, None, False)
+        ])
+
+    def test_data_store_single_header(self):
+        """Testar que dois monitores criados antes da primeira escrita gravam um só cabeçalho"""
+        first, second = EndpointMonitor(), EndpointMonitor()
         
-        # Fazer o mock_executor_instance.submit retornar os futures adequados
-        mock_executor_instance.submit.side_effect = [future1, future2]
+        for monitor, name in ((first, "test1"), (second, "test2")):
+            monitor._open_data_store()
+            monitor._save_results([_to_csv_line([name, "https://example.com", "2023-01-01T12:00:00", 200, 1.0, True, ""])])
+            monitor._close_data_store()
         
-        # Patch o método _save_result para evitar escrita em disco
-        with patch.object(EndpointMonitor, '_save_result') as mock_save:
-            # Instanciar monitor
-            monitor = EndpointMonitor()
-            
-            # Executar método fetch
-            results = monitor.fetch(output=False)
-            
-            # Verificar se submit foi chamado duas vezes (uma para cada endpoint)
-            self.assertEqual(mock_executor_instance.submit.call_count, 2)
-            
-            # Verificar se _save_result foi chamado duas vezes
-            self.assertEqual(mock_save.call_count, 2)
-            
-            # Verificar se retornou dois resultados
-            self.assertEqual(len(results), 2)
-            
-            # Verificar conteúdo dos resultados
-            self.assertIn(result1, results)
-            self.assertIn(result2, results)
-            
-        # Testar fetch com endpoints específicos
-        with patch.object(EndpointMonitor, '_save_result'), \
-             patch.object(EndpointMonitor, '_check_endpoint') as mock_check:
-            
-            mock_check.return_value = result1
-            
-            # Redefinir mock para teste de endpoints específicos
-            mock_executor_instance.reset_mock()
-            mock_executor_instance.submit.side_effect = [future1]
-            
-            # Chamar fetch com nome de endpoint específico
-            results = monitor.fetch(endpoint_names=["test1"], output=False)
-            
-            # Verificar se submit foi chamado apenas uma vez
-            self.assertEqual(mock_executor_instance.submit.call_count, 1)
-            
-            # Verificar o resultado
-            self.assertEqual(len(results), 1)
-            self.assertEqual(results[0], result1)
+        with open(self.test_data_store_file, newline='') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], ",".join(DATA_STORE_FIELDS))
+        self.assertEqual(len(lines), 3)
+
+    @patch('time.sleep')
+    @patch('time.monotonic')
+    @patch.object(EndpointMonitor, 'fetch')
+    def test_live_schedules_on_deadline(self, mock_fetch, mock_monotonic, mock_sleep):
+        """Testar que o modo live desconta a duração do scan do intervalo"""
+        # Início em 0s; primeiro scan termina aos 3s; segundo ultrapassa o intervalo (25s)
+        mock_monotonic.side_effect = [0, 3, 25]
+        mock_sleep.side_effect = [None, KeyboardInterrupt]
+        
+        monitor = EndpointMonitor()
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            monitor.live(interval=10)
+        
+        # Dorme apenas o que falta até ao próximo tick, e recomeça após um atraso
+        self.assertEqual(mock_sleep.call_args_list, [call(7), call(10)])
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertIn("longer than the 10s interval", fake_out.getvalue())
+
+    @patch('time.sleep')
+    @patch('time.monotonic')
+    @patch.object(EndpointMonitor, 'fetch')
+    def test_live_zero_interval(self, mock_fetch, mock_monotonic, mock_sleep):
+        """Testar que o modo live com intervalo 0 faz scans seguidos sem avisos de atraso"""
+        mock_monotonic.side_effect = [0, 1, 2]
+        mock_sleep.side_effect = [None, KeyboardInterrupt]
+        
+        monitor = EndpointMonitor()
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            monitor.live(interval=0)
+        
+        self.assertEqual(mock_sleep.call_args_list, [call(0), call(0)])
+        self.assertNotIn("Warning", fake_out.getvalue())
+
+
+    def test_print_results(self):
+        """Testar o formato exato da tabela de resultados"""
+        rows = [
+            ResultRow("api", "http://a.io", "2023-01-01T12:00:00", 200, 12.5, True),
+            ResultRow("web", "http://web.example", "2023-01-01T12:00:05", None, None, False),
+        ]
+        
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            self._monitor._print_results(rows)
+        
+        # Colunas alinhadas pela entrada mais longa, estado a cores e N/A sem tempo de resposta
+        self.assertEqual(fake_out.getvalue(), (
+            "ENDPOINT URL                STATUS RESPONSE TIME (ms) TIMESTAMP\n"
+            + "-" * 100 + "\n"
+            "api      http://a.io        \033[92mUP    \033[0m 12.5               2023-01-01T12:00:00\n"
+            "web      http://web.example \033[91mDOWN  \033[0m N/A                2023-01-01T12:00:05\n"
+        ))
+
+    @patch('endpoint_monitor.print', create=True)
+    def test_max_workers_from_env(self, mock_print):
+        """Testar a leitura e validação de ENDPOINT_MONITOR_MAX_WORKERS"""
+        with patch.dict(os.environ, {"ENDPOINT_MONITOR_MAX_WORKERS": "32"}):
+            self.assertEqual(_max_workers_from_env(), 32)
+        
+        # Valores abaixo de 1 são ajustados para 1
+        with patch.dict(os.environ, {"ENDPOINT_MONITOR_MAX_WORKERS": "0"}):
+            self.assertEqual(_max_workers_from_env(), 1)
+        mock_print.assert_not_called()
+        
+        # Valores inválidos usam o valor por omissão, com um aviso
+        with patch.dict(os.environ, {"ENDPOINT_MONITOR_MAX_WORKERS": "many"}):
+            self.assertEqual(_max_workers_from_env(), 256)
+        mock_print.assert_called_once_with("Warning: invalid ENDPOINT_MONITOR_MAX_WORKERS 'many', using 256")
 
 
 if __name__ == '__main__':